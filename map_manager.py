@@ -1,31 +1,143 @@
+import atexit
 import json
+import os
+import tempfile
+from collections import deque
 from pathlib import Path
 
+import orjson
+
 MAP_FILE = Path("/home/zinc/workstation/mytools/paperename/acronym_map.json")
 
+# 进程内缓存：避免批量处理时反复读取/解析 JSON
+_cache = None
+_cache_mtime = None
+_dirty = False
+# 由 map 的 key（小写）构建的 Aho–Corasick 自动机，随缓存一起失效
+_automaton = None
+# 会议全名 -> 简称 的匹配结果（同一批次里同一会议通常出现多次）
+_match_cache = {}
+
+def _invalidate_matcher():
+    """map 内容变化后丢弃自动机和匹配结果"""
+    global _automaton
+    _automaton = None
+    _match_cache.clear()
+
 def load_map():
-    """读取 JSON 文件并返回 dict"""
-    with open(MAP_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """读取 JSON 文件并返回 dict（文件未变化时直接返回缓存）"""
+    global _cache, _cache_mtime
+    if _dirty:
+        # 有尚未落盘的修改，以内存中的数据为准
+        return _cache
+    mtime = MAP_FILE.stat().st_mtime
+    if _cache is not None and mtime == _cache_mtime:
+        return _cache
+    with open(MAP_FILE, "rb") as f:
+        _cache = orjson.loads(f.read())
+    _cache_mtime = mtime
+    _invalidate_matcher()
+    return _cache
 
 def save_map(data):
-    """将 dict 写回 JSON 文件"""
-    with open(MAP_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    """将 dict 原子地写回 JSON 文件（先写临时文件再替换），并同步缓存"""
+    global _cache, _cache_mtime, _dirty
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    fd, tmp_path = tempfile.mkstemp(dir=MAP_FILE.parent, prefix=MAP_FILE.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if MAP_FILE.exists():
+            # mkstemp 创建的文件权限是 0600，保持原文件的权限
+            os.chmod(tmp_path, MAP_FILE.stat().st_mode & 0o777)
+        os.replace(tmp_path, MAP_FILE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    # data 可能就是 load_map() 返回并被原地修改过的缓存 dict，
+    # 所以每次保存都让自动机和匹配结果失效（下次匹配时再按需重建）
+    _invalidate_matcher()
+    _cache = data
+    _cache_mtime = MAP_FILE.stat().st_mtime
+    _dirty = False
+
+def flush():
+    """仅当缓存有未保存的修改时写回磁盘"""
+    if _dirty:
+        save_map(_cache)
+
+# 程序退出（包括异常退出）时兜底落盘
+atexit.register(flush)
+
+def _build_automaton(data):
+    """将 map 的 key（小写）构建为 Aho–Corasick 自动机：(goto, fail, out)"""
+    goto, fail, out = [{}], [0], [[]]
+    for full, short in data.items():
+        key = full.lower()
+        if not key:
+            continue
+        node = 0
+        for ch in key:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                fail.append(0)
+                out.append([])
+            node = nxt
+        out[node].append((len(key), short))
+
+    # BFS 计算失败指针，并把失败链上的输出合并进来
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for ch, nxt in goto[node].items():
+            queue.append(nxt)
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            out[nxt] = out[nxt] + out[fail[nxt]]
+    return goto, fail, out
+
+def match_acronym(text):
+    """单次线性扫描 text（忽略大小写），返回最长（同长取最靠前）的 key 对应的简称"""
+    global _automaton
+    data = load_map()
+    if text in _match_cache:
+        return _match_cache[text]
+    if _automaton is None:
+        _automaton = _build_automaton(data)
+    goto, fail, out = _automaton
+
+    best = None  # (length, start, short)
+    node = 0
+    for i, ch in enumerate(text.lower()):
+        while node and ch not in goto[node]:
+            node = fail[node]
+        node = goto[node].get(ch, 0)
+        for length, short in out[node]:
+            start = i - length + 1
+            if best is None or length > best[0] or (length == best[0] and start < best[1]):
+                best = (length, start, short)
+    result = best[2] if best else None
+    _match_cache[text] = result
+    return result
 
 def find_acronym(text):
     """在 text 中查找是否包含任意 map 的 key"""
-    data = load_map()
-    for key, value in data.items():
-        if key in text:
-            return value
-    return None
+    return match_acronym(text)
 
 def insert_entry(key, value):
-    """插入新的 key-value 对"""
+    """插入新的 key-value 对（先写入缓存，调用 flush() 时才落盘）"""
+    global _dirty
     data = load_map()
     data[key] = value
-    save_map(data)
+    _dirty = True
+    _invalidate_matcher()
 
 def print_map():
     """按 JSON 格式打印 map"""
@@ -41,5 +153,6 @@ if __name__ == "__main__":
 
     # # 示例：插入新条目
     insert_entry("Proceedings of the ACM Symposiumdd on Operating Systems Principles", "SOSPd")
+    flush()
     # print("已插入新条目。")
     print_map()
@@ -2,152 +2,328 @@ import os
 import sys
 import re
 import unicodedata
-from typing import Optional, List
+import functools
+import bisect
+import mmap
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple
 from pathlib import Path
-import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from PyPDF2 import PdfReader
 
+try:
+    import pymupdf  # much faster page-1 text extraction; PyPDF2 is the fallback
+except ImportError:
+    pymupdf = None
+
 import map_manager
 
 
-# Strict DOI regex (Crossref-style), with a clear right boundary
+# Strict DOI regex (Crossref-style). The suffix run is matched atomically
+# (lookahead + backreference), so it never backtracks; the right boundary
+# is checked in iter_doi_matches() instead of with a lookahead.
 CROSSREF_DOI_RE = re.compile(
-    r'(?i)\b10\.\d{4,9}/[-._;()/:A-Z0-9]+(?=$|[\s\)\]\}\.,;:<>\"\'\?])'
+    r'\b10\.\d{4,9}/(?=(?P<suffix>[-._;()/:A-Z0-9]+))(?P=suffix)',
+    re.IGNORECASE,
 )
-
-# Venue acronyms for cleaner filenames
-ACRONYM_MAP = {
-    # "Proceedings of the ACM International Conference on the Foundations of Software Engineering": "FSE",
-    # "Proceedings of the ACM SIGPLAN Conference on Programming Language Design and Implementation": "PLDI",
-    # "Proceedings of the International Conference on Software Engineering": "ICSE",
-    # "Proceedings of the International Conference on Machine Learning": "ICML",
-    # "Proceedings of the AAAI Conference on Artificial Intelligence": "AAAI",
-    # "Proceedings of the IEEE Conference on Computer Vision and Pattern Recognition": "CVPR",
-    # "Proceedings of the Neural Information Processing Systems": "NeurIPS",
-    # "arXiv": "arXiv",
-}
+# Characters allowed right after a DOI (besides any whitespace, see str.isspace)
+_DOI_RIGHT_BOUNDARY = frozenset(' \t\n\r\f\v)]}.,;:<>"\'?')
+# Boundary characters that can also occur inside a DOI suffix
+_DOI_INNER_BOUNDARY = '.;:)'
+
+# _clean_doi(): trailing noise glued to a DOI, and the minimal valid shape
+_DOI_TAIL_RE = re.compile(r'(Files|PDF|Abstract|Full.*?Text|Download).*$', re.IGNORECASE)
+_VALID_DOI_RE = re.compile(r'^10\.\d+/.+[^.]$')
+
+# Contact address sent to Crossref so requests land in the "polite" pool;
+# set PAPERRENAME_MAILTO to your e-mail. Unset means no contact is sent.
+CROSSREF_MAILTO = os.environ.get("PAPERRENAME_MAILTO", "").strip() or None
+
+# Shared HTTP session: keeps TLS connections to doi.org / api.crossref.org alive
+# and persists responses on disk, so repeat runs don't hit the network again.
+# 4xx answers are cached too (negative cache), so dead DOIs aren't retried.
+# Built on first use, so importing this module doesn't create the cache file.
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _session() -> requests_cache.CachedSession:
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests_cache.CachedSession(
+                cache_name=os.path.expanduser("~/.cache/paperrename_doi"),
+                backend="sqlite",
+                expire_after=timedelta(days=90),
+                allowable_codes=(200, 404, 403, 402),
+            )
+            session.headers.update({
+                "User-Agent": f"PaperRename/1.0 (mailto:{CROSSREF_MAILTO})" if CROSSREF_MAILTO else "PaperRename/1.0",
+            })
+            adapter = HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=16,
+                max_retries=Retry(total=1, connect=1, read=1, backoff_factor=0.2,
+                                  status_forcelist=[429, 500, 502, 503, 504]),
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+        return _SESSION
+
+
+# DOI lookups are network-bound, so run them on a small thread pool
+# (one lookup in flight per worker; keep it <= the adapter's pool_maxsize)
+MAX_WORKERS = 8
+
+# Characters that are illegal or awkward in filenames (all single chars -> one translate pass)
+_FN_TRANS = str.maketrans({
+    ' ': '_',
+    ':': '=',
+    '/': '-',
+    '\\': '-',
+    '|': '-',
+    '*': '',
+    '?': '',
+    '"': "'",
+    '<': '',
+    '>': '',
+})
+_FN_RUNS_RE = re.compile(r'([_-])\1+')
 
 def smart_filename_transform(filename: str) -> str:
-    mapping = {
-        ' ': '_',
-        ':': '=',
-        '/': '-',
-        '\\': '-',
-        '|': '-',
-        '*': '',
-        '?': '',
-        '"': "'",
-        '<': '',
-        '>': '',
-    }
-    for old, new in mapping.items():
-        filename = filename.replace(old, new)
-    filename = re.sub(r'_{2,}', '_', filename)
-    filename = re.sub(r'-{2,}', '-', filename)
+    filename = filename.translate(_FN_TRANS)
+    filename = _FN_RUNS_RE.sub(r'\1', filename)
     return filename.strip('_-=')
 
 
+_SUP_TRANS = str.maketrans('', '', '¹²³⁴⁵⁶⁷⁸⁹⁰')
+
 def _preclean_text(text: str) -> str:
     # Normalize and remove common superscripts to avoid tail-sticking
+    if text.isascii():
+        # Nothing to normalize and no superscripts to strip
+        return text
     text = unicodedata.normalize('NFKC', text)
-    superscripts = str.maketrans('', '', '¹²³⁴⁵⁶⁷⁸⁹⁰')
-    return text.translate(superscripts)
+    return text.translate(_SUP_TRANS)
 
 
 def prefer_specific_dois(cands: List[str]) -> List[str]:
-    # Drop "parent DOIs" that are strict prefixes of more specific ones
+    # Drop "parent DOIs" that are strict prefixes of more specific ones.
+    # Longest first, so every possible extension of c is already kept; kept
+    # DOIs extending c sit right after c in lexicographic order.
     keep = []
-    for c in cands:
+    kept_sorted = []
+    for c in sorted(dict.fromkeys(cands), key=len, reverse=True):
+        i = bisect.bisect_left(kept_sorted, c)
         drop = False
-        for d in cands:
-            if d != c and d.startswith(c) and len(d) > len(c):
-                next_char = d[len(c)]
-                if next_char in ".-_/":
-                    drop = True
-                    break
+        while i < len(kept_sorted) and kept_sorted[i].startswith(c):
+            if kept_sorted[i][len(c)] in ".-_/":
+                drop = True
+                break
+            i += 1
         if not drop:
             keep.append(c)
-    keep = sorted(set(keep), key=len, reverse=True)
+            bisect.insort(kept_sorted, c)
     return keep
 
-def clean_doi_list(cands):
+def _clean_doi(doi: str) -> Optional[str]:
+    """清理单个 DOI，无效或不完整时返回 None"""
+    if not doi:  # 跳过空字符串
+        return None
+
+    # 移除常见的后缀干扰词
+    doi_clean = _DOI_TAIL_RE.sub('', doi)
+
+    # 移除首尾空白
+    doi_clean = doi_clean.strip()
+
+    # 检查是否为有效的 DOI 格式
+    # DOI 通常格式为 10.xxxx/xxxxx，至少应该有完整的结构
+    # 同时确保不是以点号结尾（不完整的 DOI）
+    if _VALID_DOI_RE.match(doi_clean) and not doi_clean.endswith('.'):
+        return doi_clean
+    return None
+
+
+def iter_doi_matches(text: str) -> Iterator[str]:
     """
-    清理 DOI 列表，移除无效或不完整的 DOI 
-    Args:
-        cands (list): 包含可能的 DOI 字符串的列表
-    Returns:
-        list: 清理后的有效 DOI 列表
+    Yield DOI matches from text in order, in linear time.
+
+    A DOI must be followed by end-of-text or a boundary character; if the
+    greedy suffix run is not, it is cut back to the last boundary character
+    inside it (what a backtracking lookahead would do, without the cost).
     """
-    cleaned = []
-    
-    for doi in cands:
-        if not doi:  # 跳过空字符串
-            continue
-            
-        # 移除常见的后缀干扰词
-        doi_clean = re.sub(r'(Files|PDF|Abstract|Full.*Text|Download).*$', '', doi, flags=re.IGNORECASE)
-        
-        # 移除首尾空白
-        doi_clean = doi_clean.strip()
-        
-        # 检查是否为有效的 DOI 格式
-        # DOI 通常格式为 10.xxxx/xxxxx，至少应该有完整的结构
-        if re.match(r'^10\.\d+/.+[^.]$', doi_clean):
-            # 确保不是以点号结尾（不完整的 DOI）
-            if not doi_clean.endswith('.'):
-                cleaned.append(doi_clean)
-    
-    return cleaned
+    pos = 0
+    n = len(text)
+    while True:
+        m = CROSSREF_DOI_RE.search(text, pos)
+        if not m:
+            return
+        start, end = m.start(), m.end()
+        if end < n and text[end] not in _DOI_RIGHT_BOUNDARY and not text[end].isspace():
+            suffix_start = m.start("suffix")
+            end = max(text.rfind(c, suffix_start + 1, end) for c in _DOI_INNER_BOUNDARY)
+            if end < 0:
+                pos = start + 1
+                continue
+        yield text[start:end]
+        pos = end
+
 
+def extract_all_dois_from_text(text: str) -> Iterator[str]:
+    """Yield cleaned, de-duplicated DOIs in first-occurrence order."""
+    seen = set()
+    for raw in iter_doi_matches(_preclean_text(text)):
+        doi = _clean_doi(raw)
+        if doi and doi not in seen:
+            seen.add(doi)
+            yield doi
 
-def extract_all_dois_from_text(text: str) -> List[str]:
-    text = _preclean_text(text)
-    cands = list({m.group(0) for m in CROSSREF_DOI_RE.finditer(text)})
-    cands = clean_doi_list(cands)
-    return prefer_specific_dois(cands)
 
+# Messages from DOI lookups running on worker threads are held here and
+# printed by main() under the PDF they belong to
+_log_buffer = threading.local()
 
-def _try_fetch(doi: str) -> Optional[dict]:
+
+def _log(msg: str) -> None:
+    lines = getattr(_log_buffer, "lines", None)
+    if lines is None:
+        print(msg)
+    else:
+        lines.append(msg)
+
+
+# Timeouts (seconds) for the as-is lookup and for the digit-trimming guesses
+DOI_FETCH_TIMEOUT = 12
+DOI_RETRY_TIMEOUT = 5
+
+
+def _try_fetch(doi: str, timeout: float = DOI_FETCH_TIMEOUT) -> Tuple[Optional[dict], Optional[int]]:
+    """Return (metadata, HTTP status); status is None if the request itself failed."""
     headers = {'Accept': 'application/vnd.citationstyles.csl+json'}
     url = f'https://doi.org/{doi}'
+    status = None
     try:
-        resp = requests.get(url, headers=headers, timeout=12)
-        if resp.status_code == 200:
-            return resp.json()
-        print(f"[WARN] DOI metadata HTTP {resp.status_code} for {doi}")
+        resp = _session().get(url, headers=headers, timeout=timeout)
+        status = resp.status_code
+        if status == 200:
+            return resp.json(), status
+        _log(f"[WARN] DOI metadata HTTP {status} for {doi}")
     except Exception as e:
-        print(f"[ERROR] DOI metadata fetch failed for {doi}: {e}")
-    return None
+        _log(f"[ERROR] DOI metadata fetch failed for {doi}: {e}")
+    return None, status
 
 
+@functools.lru_cache(maxsize=4096)
 def fetch_doi_metadata(doi: str) -> Optional[dict]:
+    # Memoized: a DOI shared by several PDFs in one batch (including failures)
+    # is only resolved once.
     # Try as-is
-    meta = _try_fetch(doi)
+    meta, status = _try_fetch(doi)
     if meta:
         return meta
+    # Only a "not found" can be explained by a stuck footnote digit; timeouts,
+    # network errors and 5xx would just repeat for the trimmed guesses.
+    if status != 404:
+        return None
     # Robustness for footnote digits accidentally stuck to the tail
     for k in (1, 2):
         if len(doi) > k and doi[-k:].isdigit():
             trimmed = doi[:-k]
-            meta = _try_fetch(trimmed)
+            meta, _ = _try_fetch(trimmed, timeout=DOI_RETRY_TIMEOUT)
             if meta:
-                print(f"[INFO] Trimmed trailing digits: {doi} -> {trimmed}")
+                _log(f"[INFO] Trimmed trailing digits: {doi} -> {trimmed}")
                 return meta
     return None
 
 
-def _get_year(metadata: dict) -> Optional[int]:
-    def year_from(dp):
+CROSSREF_WORKS_URL = "https://api.crossref.org/works"
+CROSSREF_BATCH_SIZE = 40
+# Only the fields pick_best_doi / _get_title / _get_year / _get_container read;
+# without select= every item carries its full reference list
+CROSSREF_SELECT = ",".join([
+    "DOI", "title", "author", "type", "container-title",
+    "issued", "published-print", "published-online", "created",
+])
+
+
+def fetch_crossref_batch(dois: Iterable[str]) -> Dict[str, dict]:
+    """
+    Resolve many DOIs with as few Crossref requests as possible.
+
+    Uses `/works?filter=doi:A,doi:B,...` in chunks; a chunk that hits the
+    URI length limit (HTTP 414) is split in half and retried.
+    Returns a dict keyed by lower-cased DOI. DOIs Crossref does not know
+    (e.g. DataCite/arXiv) are simply absent.
+    """
+    dois = sorted(set(d.lower() for d in dois))
+    pending = [dois[i:i + CROSSREF_BATCH_SIZE] for i in range(0, len(dois), CROSSREF_BATCH_SIZE)]
+    index = {}
+    while pending:
+        chunk = pending.pop()
+        params = {
+            "filter": ",".join(f"doi:{d}" for d in chunk),
+            "rows": len(chunk),
+            "select": CROSSREF_SELECT,
+        }
+        if CROSSREF_MAILTO:
+            params["mailto"] = CROSSREF_MAILTO
         try:
-            return int(dp.get("date-parts", [[None]])[0][0])
-        except Exception:
-            return None
-
-    for key in ("issued", "published-print", "published-online", "created"):
-        if key in metadata:
-            y = year_from(metadata[key])
-            if y:
-                return y
+            resp = _session().get(CROSSREF_WORKS_URL, params=params, timeout=20)
+        except Exception as e:
+            print(f"[ERROR] Crossref batch lookup failed: {e}")
+            continue
+        if resp.status_code == 414 and len(chunk) > 1:
+            half = len(chunk) // 2
+            pending.extend([chunk[:half], chunk[half:]])
+            continue
+        if resp.status_code != 200:
+            print(f"[WARN] Crossref batch lookup HTTP {resp.status_code} for {len(chunk)} DOIs")
+            continue
+        try:
+            items = resp.json().get("message", {}).get("items", [])
+        except ValueError as e:
+            print(f"[ERROR] Crossref batch response is not JSON: {e}")
+            continue
+        for item in items:
+            doi = item.get("DOI")
+            if doi:
+                index[doi.lower()] = item
+    return index
+
+
+def lookup_doi_metadata(doi: str, metadata_index: Optional[Dict[str, dict]] = None) -> Optional[dict]:
+    """Look the DOI up in the batch results first, fall back to doi.org."""
+    if metadata_index is not None:
+        meta = metadata_index.get(doi.lower())
+        if meta:
+            return meta
+    meta = fetch_doi_metadata(doi)
+    if meta and metadata_index is not None:
+        metadata_index[doi.lower()] = meta
+    return meta
+
+
+_YEAR_KEYS = ("issued", "published-print", "published-online", "created")
+
+def _get_year(metadata: dict) -> Optional[int]:
+    # Plain isinstance checks instead of try/except: malformed date-parts are common
+    for key in _YEAR_KEYS:
+        part = metadata.get(key)
+        if not isinstance(part, dict):
+            continue
+        dp = part.get("date-parts")
+        if isinstance(dp, list) and dp and isinstance(dp[0], list) and dp[0]:
+            v = dp[0][0]
+            if isinstance(v, int) and v:
+                return v
+            if isinstance(v, str) and v.isdigit() and int(v):
+                return int(v)
     return None
 
 
@@ -166,23 +342,20 @@ def _get_container(metadata: dict) -> str:
 
 
 def generate_filename(metadata: dict) -> str:
-    title = _get_title(metadata)
+    title = _get_title(metadata) or "untitled"
     year = _get_year(metadata) or "unknown"
 
     container = _get_container(metadata) or "unknown"
-    # print(type(ACRONYM_MAP), ACRONYM_MAP)
-    for full, short in ACRONYM_MAP.items():
-        # if container.lower().startswith(full.lower()):
-        if full.lower() in container.lower():
-            container = short
-            break
+    short = map_manager.match_acronym(container)
+    if short:
+        container = short
     else:
         # 暂时不更新配置文件，直接用会议全名
         # map_manager.insert_entry(container,"Unkonwn")
         container = smart_filename_transform(container)
-        
 
-    title_safe = smart_filename_transform(title or _get_title(metadata) or "untitled")
+
+    title_safe = smart_filename_transform(title)
     filename =  f"[{year}]【{title_safe}】---[{container}]"
     return filename
 
@@ -229,9 +402,27 @@ def generate_filename(metadata: dict) -> str:
 #             print(f"[ERROR] Unable to access path {raw}: {e}")
 
 #     return pdf_files
-def collect_pdf_files(paths: List[str]) -> List[str]:
+def _scan_pdf_entries(root: str) -> Iterator[os.DirEntry]:
+    """Recursively yield DirEntry objects for *.pdf files (any case) under root."""
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)  # release the fd before recursing
+    except OSError as e:
+        print(f"[WARN] Unable to scan directory {root}: {e}")
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_pdf_entries(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+                yield entry
+        except OSError:
+            continue
+
+def collect_pdf_files(paths: List[str]) -> Iterator[str]:
     """
-    Collect PDF files from given paths.
+    Yield PDF files from given paths as they are discovered, so processing
+    can start before a large tree has been fully walked.
 
     Special rule:
       - If the caller passed '.' (or './', './.'), then while scanning that entry
@@ -239,7 +430,6 @@ def collect_pdf_files(paths: List[str]) -> List[str]:
       - If caller passed a specific filename or a specific directory path (not '.'),
         do NOT skip bracket-starting files.
     """
-    pdf_files = []
     seen = set()  # for de-dup
 
     for raw in paths:
@@ -254,55 +444,52 @@ def collect_pdf_files(paths: List[str]) -> List[str]:
         p = Path(raw).resolve()  # normalize to absolute path
         try:
             if p.is_dir():
-                for f in p.rglob("*.pdf"):
+                for entry in _scan_pdf_entries(str(p)):
                     # If input was '.' we skip filenames starting with '[' or '【'
                     if skip_bracket:
-                        name = f.name.lstrip()  # ignore leading whitespace
+                        name = entry.name.lstrip()  # ignore leading whitespace
                         if name.startswith('[') or name.startswith('【'):
                             # skip this file only when scanning '.' input
                             continue
 
-                    fp = str(f.resolve())
+                    # p is already resolved, so only symlinked files need resolving
+                    fp = os.path.realpath(entry.path) if entry.is_symlink() else entry.path
                     if fp not in seen:
-                        pdf_files.append(fp)
                         seen.add(fp)
+                        yield fp
 
             elif p.is_file() and p.suffix.lower() == ".pdf":
                 # If user explicitly passed a file path, do NOT skip it even if it starts with '['.
                 fp = str(p)
                 if fp not in seen:
-                    pdf_files.append(fp)
                     seen.add(fp)
+                    yield fp
             else:
                 print(f"[WARN] Skipped unsupported path: {raw}")
         except OSError as e:
             print(f"[ERROR] Unable to access path {raw}: {e}")
 
-    return pdf_files
+# 明显不是标题的行（页眉页脚、DOI、会议信息等），合并成一个正则只编译一次
+_TITLE_IGNORE_RE = re.compile(
+    r"^doi\s*:?|^DOI\s|proceedings of|arxiv preprint|copyright|www\.|^\d+$|^\d+\s*©|license",
+    re.IGNORECASE,
+)
+_WHITESPACE_RE = re.compile(r"\s+")
 
 def extract_paper_title(text: str) -> Optional[str]:
-    # 按行拆分，并去除首尾空白
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-
-    # 过滤掉明显不是标题的行（页眉页脚、DOI、会议信息等）
-    ignore_patterns = [
-        r"^doi\s*:?", r"^DOI\s", r"proceedings of", r"arxiv preprint",
-        r"copyright", r"www\.", r"^\d+$", r"^\d+\s*©", r"license"
-    ]
-    filtered = []
-    for line in lines:
-        if any(re.search(pat, line, flags=re.I) for pat in ignore_patterns):
-            continue
-        filtered.append(line)
-
-    if not filtered:
-        return None
-
     # 候选规则：长度大于 5，少于 300，且不是全大写
+    # 只会用到前两个候选，凑够就停止扫描
     candidates = []
-    for line in filtered:
-        if 5 < len(line) < 300 and not (line.isupper() and len(line) > 10):
-            candidates.append(line)
+    for line in text.splitlines():
+        # 去除首尾空白
+        line = line.strip()
+        if not (5 < len(line) < 300) or (line.isupper() and len(line) > 10):
+            continue
+        if _TITLE_IGNORE_RE.search(line):
+            continue
+        candidates.append(line)
+        if len(candidates) == 2:
+            break
 
     if not candidates:
         return None
@@ -318,11 +505,75 @@ def extract_paper_title(text: str) -> Optional[str]:
             title = combined
 
     # 去除多余空格
-    return re.sub(r"\s+", " ", title).strip()
+    return _WHITESPACE_RE.sub(" ", title).strip()
+
+def _find_doi_in_values(values: Iterable) -> Optional[str]:
+    for v in values:
+        if not v:
+            continue
+        for raw in iter_doi_matches(_preclean_text(str(v))):
+            doi = _clean_doi(raw)
+            if doi:
+                return doi
+    return None
+
+
+def _embedded_doi_pymupdf(doc) -> Optional[str]:
+    values = list(doc.metadata.values()) if doc.metadata else []
+    # Non-standard Info keys such as /doi are not in doc.metadata
+    kind, ref = doc.xref_get_key(-1, "Info")
+    if kind == "xref":
+        info_xref = int(ref.split()[0])
+        values += [doc.xref_get_key(info_xref, k)[1] for k in doc.xref_get_keys(info_xref)]
+    values.append(doc.get_xml_metadata())  # XMP: dc:identifier, prism:doi, ...
+    return _find_doi_in_values(values)
+
+
+def _embedded_doi_pypdf2(reader: PdfReader) -> Optional[str]:
+    values = list((reader.metadata or {}).values())
+    xmp = reader.xmp_metadata
+    if xmp is not None:
+        values.append(xmp.dc_identifier)
+    return _find_doi_in_values(values)
+
+
+def _embedded_doi(read, doc) -> Optional[str]:
+    try:
+        return read(doc)
+    except Exception:
+        # Unreadable metadata just means we fall back to the page text
+        return None
+
+
+def _read_pdf_pymupdf(pdf_path: str, use_embedded: bool) -> Tuple[Optional[str], Optional[str]]:
+    with pymupdf.open(pdf_path) as doc:
+        if doc.needs_pass:
+            doc.authenticate("")
+        if use_embedded:
+            doi = _embedded_doi(_embedded_doi_pymupdf, doc)
+            if doi:
+                return doi, None
+        if doc.page_count == 0:
+            print("[WARN] PDF has no pages.")
+            return None, None
+        flags = pymupdf.TEXTFLAGS_TEXT & ~pymupdf.TEXT_PRESERVE_IMAGES
+        return None, doc.load_page(0).get_text("text", flags=flags) or ""
 
-def extract_best_doi_from_first_page(pdf_path: str) -> Optional[str]:
+
+def _read_pdf_pypdf2(pdf_path: str, use_embedded: bool) -> Tuple[Optional[str], Optional[str]]:
+    # mmap the file so the OS only pages in the parts PyPDF2 actually reads
     try:
-        reader = PdfReader(pdf_path)
+        with open(pdf_path, "rb") as fp, \
+                mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _read_pdf_pypdf2_stream(mm, use_embedded)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Failed to open PDF: {e}")
+        return None, None
+
+
+def _read_pdf_pypdf2_stream(stream, use_embedded: bool) -> Tuple[Optional[str], Optional[str]]:
+    try:
+        reader = PdfReader(stream)
     except Exception as e:
         print(f"[ERROR] Failed to open PDF: {e}")
         return None, None
@@ -336,34 +587,86 @@ def extract_best_doi_from_first_page(pdf_path: str) -> Optional[str]:
     except Exception:
         pass
 
+    if use_embedded:
+        doi = _embedded_doi(_embedded_doi_pypdf2, reader)
+        if doi:
+            return doi, None
+
     try:
         if not reader.pages:
             print("[WARN] PDF has no pages.")
             return None, None
-        text = reader.pages[0].extract_text() or ""
+        return None, reader.pages[0].extract_text() or ""
     except Exception as e:
         print(f"[ERROR] Failed to extract text from page 1: {e}")
         return None, None
 
-    candidates = extract_all_dois_from_text(text)
-    title = extract_paper_title(text)
-    # print(f"可能的题目{title}")
-    print(f"Found DOI candidates on first page: {candidates}")
 
+def read_pdf(pdf_path: str, use_embedded: bool = True) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Open the PDF once and return (embedded DOI, page-1 text).
+
+    With use_embedded, a DOI found in the Info dictionary / XMP metadata is
+    returned and the page text is not extracted. Uses PyMuPDF, falling back
+    to PyPDF2; the text is None on failure.
+    """
+    if pymupdf is not None:
+        try:
+            return _read_pdf_pymupdf(pdf_path, use_embedded)
+        except Exception as e:
+            print(f"[WARN] PyMuPDF failed, falling back to PyPDF2: {e}")
+    return _read_pdf_pypdf2(pdf_path, use_embedded)
+
+
+def read_first_page_text(pdf_path: str) -> Optional[str]:
+    """Text of page 1 via PyMuPDF, falling back to PyPDF2; None on failure."""
+    return read_pdf(pdf_path, use_embedded=False)[1]
+
+
+def analyse_first_page(text: Optional[str]) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Return (DOI candidates, guessed title) from page-1 text; (None, None) without text."""
+    if text is None:
+        return None, None
+    return list(extract_all_dois_from_text(text)), extract_paper_title(text)
+
+
+def read_first_page(pdf_path: str) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Return (DOI candidates, guessed title) from page 1; (None, None) on failure."""
+    return analyse_first_page(read_first_page_text(pdf_path))
+
+
+def pick_best_doi(candidates: List[str],
+                  metadata_index: Optional[Dict[str, dict]] = None) -> Tuple[Optional[str], Optional[dict]]:
     preferred_types = {"journal-article", "proceedings-article", "posted-content", "report"}
 
-    for doi in candidates:
-        meta = fetch_doi_metadata(doi)
-        if not meta:
-            continue
-        if meta.get("author") and (meta.get("type") in preferred_types):
-            return doi, title
+    def lookup(doi):
+        return lookup_doi_metadata(doi, metadata_index)
 
+    # First pass: page order, stop at the first authored article-like record.
+    # Sequential on purpose: main() already runs one pick_best_doi per PDF on
+    # the shared pool, which bounds the number of requests in flight.
     for doi in candidates:
-        if fetch_doi_metadata(doi):
-            return doi, title
+        meta = lookup(doi)
+        if meta and meta.get("author") and (meta.get("type") in preferred_types):
+            return doi, meta
 
-    return None,title
+    # Fallback: most specific DOI that resolves at all (lookups are memoized)
+    for doi in prefer_specific_dois(candidates):
+        meta = lookup(doi)
+        if meta:
+            return doi, meta
+
+    return None, None
+
+
+def _pick_best_doi_buffered(candidates: List[str], metadata_index: Dict[str, dict]):
+    """pick_best_doi for a worker thread: also returns the messages it logged."""
+    _log_buffer.lines = []
+    try:
+        doi, meta = pick_best_doi(candidates, metadata_index)
+        return doi, meta, _log_buffer.lines
+    finally:
+        _log_buffer.lines = None
 
 
 def main():
@@ -373,65 +676,96 @@ def main():
 
     input_paths = sys.argv[1:]
     # print("input_paths:", input_paths)
-    pdf_files = collect_pdf_files(input_paths)
 
-    if not pdf_files:
+    # Pass 1: read page 1 of every PDF as the tree is walked, and gather all
+    # DOI candidates (the batched lookup below needs the full set).
+    # A DOI embedded in the PDF metadata spares us the text extraction.
+    first_pages = {}
+    embedded = set()
+    all_dois = set()
+    for pdf_path in collect_pdf_files(input_paths):
+        if not os.path.isfile(pdf_path):
+            continue
+        doi, text = read_pdf(pdf_path)
+        if doi:
+            embedded.add(pdf_path)
+            candidates, guess_title = [doi], None
+        else:
+            candidates, guess_title = analyse_first_page(text)
+        first_pages[pdf_path] = (candidates, guess_title)
+        all_dois.update(candidates or [])
+
+    if not first_pages:
         print("No PDF files found.")
         return
 
-    global ACRONYM_MAP
-    ACRONYM_MAP = map_manager.load_map()
+    # Pass 2: resolve all candidates in batched Crossref queries
+    metadata_index = fetch_crossref_batch(all_dois)
 
-    for pdf_path in pdf_files:
-        if not os.path.isfile(pdf_path):
-            continue
+    # Resolve every PDF's best DOI concurrently; renaming stays sequential
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            pdf_path: executor.submit(_pick_best_doi_buffered, candidates or [], metadata_index)
+            for pdf_path, (candidates, _) in first_pages.items()
+        }
+
+        for pdf_path, (candidates, guess_title) in first_pages.items():
         
-        # filename = os.path.basename(pdf_path)
-        # if filename.startswith('['):
-        #     # print("=" * 80)
-        #     # print(f"Skipped (filename starts with '['): {pdf_path}")
-        #     continue
+            # filename = os.path.basename(pdf_path)
+            # if filename.startswith('['):
+            #     # print("=" * 80)
+            #     # print(f"Skipped (filename starts with '['): {pdf_path}")
+            #     continue
 
-        print("=" * 80)
-        print(f"📄 Processing: {pdf_path}")
+            print("=" * 80)
+            print(f"📄 Processing: {pdf_path}")
+
+            try:
+                if pdf_path in embedded:
+                    print(f"Found DOI in PDF metadata: {candidates[0]}")
+                else:
+                    print(f"Found DOI candidates on first page: {candidates}")
+                doi, metadata, messages = futures[pdf_path].result()
+                for msg in messages:
+                    print(msg)
+                if not doi and pdf_path in embedded:
+                    # Embedded DOI did not resolve: fall back to the page text
+                    candidates, guess_title = read_first_page(pdf_path)
+                    print(f"Found DOI candidates on first page: {candidates}")
+                    doi, metadata = pick_best_doi(candidates or [], metadata_index)
+                if guess_title is not None:
+                    print(f"可能的解析标题:{guess_title}")
+                if not doi:
+                    # print("[ERROR]  DOI Analyze Failed.")
+                    guess_title = smart_filename_transform(guess_title)
+                    filename = f"[YEAE]【{guess_title}】---[CORT]-"
+                    new_path = os.path.join(os.path.dirname(pdf_path), filename + ".pdf")
+                    if os.path.exists(new_path):
+                        print(f"[WARN] Target file already exists: {new_path}")
+                        continue
+                    os.rename(pdf_path, new_path)
+                    print(f"✅ File renamed to: {new_path}")
+                    continue
+
+                title = _get_title(metadata) or "<no title>"
+                year = _get_year(metadata) or "?"
+                print(f"Best DOI: {doi}")
+                print(f"title={title}, year={year}")
+
+                filename = generate_filename(metadata)
+                print(f"Suggested filename: {filename}")
 
-        try:
-            doi, guess_title = extract_best_doi_from_first_page(pdf_path)
-            print(f"可能的解析标题:{guess_title}")
-            if not doi:
-                # print("[ERROR]  DOI Analyze Failed.")
-                guess_title = smart_filename_transform(guess_title)
-                filename = f"[YEAE]【{guess_title}】---[CORT]-"
                 new_path = os.path.join(os.path.dirname(pdf_path), filename + ".pdf")
                 if os.path.exists(new_path):
                     print(f"[WARN] Target file already exists: {new_path}")
                     continue
+
                 os.rename(pdf_path, new_path)
                 print(f"✅ File renamed to: {new_path}")
-                continue
+            except Exception as e:
+                print(f"[ERROR] Failed to process {pdf_path}: {e}")
 
-            metadata = fetch_doi_metadata(doi)
-            if not metadata:
-                print(f"[ERROR] Failed to fetch metadata for DOI: {doi}")
-                continue
-
-            title = _get_title(metadata) or "<no title>"
-            year = _get_year(metadata) or "?"
-            print(f"Best DOI: {doi}")
-            print(f"title={title}, year={year}")
-
-            filename = generate_filename(metadata)
-            print(f"Suggested filename: {filename}")
-
-            new_path = os.path.join(os.path.dirname(pdf_path), filename + ".pdf")
-            if os.path.exists(new_path):
-                print(f"[WARN] Target file already exists: {new_path}")
-                continue
-
-            os.rename(pdf_path, new_path)
-            print(f"✅ File renamed to: {new_path}")
-        except Exception as e:
-            print(f"[ERROR] Failed to process {pdf_path}: {e}")
+    map_manager.flush()
 
 
 if __name__ == "__main__":